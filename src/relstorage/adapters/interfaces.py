@@ -836,6 +836,18 @@ class IObjectMover(Interface):
         calling the database.
         """
 
+    def make_restore_batcher(cursor, row_limit):
+        """
+        Return an object to be passed to :meth:`restore`.
+
+        The object must have a ``flush()`` method that sends any
+        queued rows to the database. Usually this is the same as
+        :meth:`make_batcher`, but databases with a more efficient bulk
+        loading mechanism may return something specialized.
+
+        .. versionadded:: 3.5.0a7
+        """
+
     def store_temps(cursor, state_oid_tid_iter):
         """
         Store many objects in the temporary table.
@@ -855,7 +867,7 @@ class IObjectMover(Interface):
 
         Used for copying transactions into this database.
 
-        batcher is an object returned by self.make_batcher().
+        batcher is an object returned by self.make_restore_batcher().
         """
 
     def detect_conflict(cursor):
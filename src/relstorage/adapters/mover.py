@@ -369,6 +369,9 @@ class AbstractObjectMover(DatabaseHelpersMixin, ABC):
             else:
                 batcher.delete_from('object_state', zoid=oid)
 
+    def make_restore_batcher(self, cursor, row_limit):
+        return self.make_batcher(cursor, row_limit)
+
     def restore(self, cursor, batcher, oid, tid, data):
         raise NotImplementedError()
 
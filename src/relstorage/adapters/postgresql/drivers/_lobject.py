@@ -26,77 +26,133 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import division
 
+import os
+
+from ...sql.query import CompiledQuery
+
 __all__ = [
     'LobConnectionMixin',
 ]
 
+# Not on Python 2, Windows or macOS.
+_fadvise = getattr(os, 'posix_fadvise', None)
+_FADV_SEQUENTIAL = getattr(os, 'POSIX_FADV_SEQUENTIAL', None)
+
+#: The size of the pages PostgreSQL stores large objects in
+#: (``LOBLKSIZE``). We transfer whole pages at a time.
+LOBLKSIZE = 2048
+
+#: How much of a large object to transfer in each round trip, unless
+#: told otherwise.
+DEFAULT_CHUNK_SIZE = 1024 * 1024 * 9
+
+def _round_to_pages(size):
+    pages = max(1, -(-size // LOBLKSIZE))
+    return pages * LOBLKSIZE
+
 
 class _WriteBlob(object):
     closed = False
 
-    def __init__(self, conn, binary):
+    def __init__(self, conn, binary, data=b''):
         self._binary = binary
         self._cursor = conn.cursor()
-        self._offset = 0
         try:
-            self._cursor.execute("SELECT lo_creat(-1)")
+            # Create the object and store its first chunk of data in
+            # a single round trip. For most blobs, that's all there is.
+            self._cursor.execute("SELECT lo_from_bytea(0, %(data)s)",
+                                 {'data': binary(data)})
             row = self._cursor.fetchone()
             self.oid = row[0]
+            self._put_stmt = conn.lob_statement(self._cursor, 'lo_put')
         except:
             self._cursor.close()
             raise
+        self._offset = len(data)
 
     def close(self):
         self._cursor.close()
         self.closed = True
 
     def write(self, data):
-        self._cursor.execute("SELECT lo_put(%(oid)s, %(off)s, %(data)s)",
-                             {'oid': self.oid, 'off': self._offset, 'data': self._binary(data)})
+        self._cursor.execute(self._put_stmt,
+                             (self.oid, self._offset, self._binary(data)))
         self._offset += len(data)
         return len(data)
 
 class _UploadBlob(object):
     closed = False
-    fetch_size = 1024 * 1024 * 9
-
-    def __init__(self, conn, new_file, binary):
-        blob = _WriteBlob(conn, binary)
-        self.oid = blob.oid
-        try:
-            with open(new_file, 'rb') as f:
-                while 1:
-                    data = f.read(self.fetch_size)
-                    if not data:
-                        break
-                    blob.write(data)
-        finally:
-            blob.close()
+    fetch_size = DEFAULT_CHUNK_SIZE
+
+    def __init__(self, conn, new_file, binary, fetch_size=None):
+        if fetch_size:
+            self.fetch_size = _round_to_pages(fetch_size)
+        with open(new_file, 'rb') as f:
+            # Read each chunk into the same buffer instead of allocating
+            # a new bytes object each time. The driver is done with it by
+            # the time each statement returns. Most blobs are much
+            # smaller than a chunk, so don't allocate more than the
+            # file needs.
+            file_size = os.fstat(f.fileno()).st_size
+            buf = bytearray(min(self.fetch_size, _round_to_pages(file_size)))
+            # We can't hand the file descriptor to the kernel and
+            # sendfile() it to the server: the data has to be framed
+            # as a bytea parameter of each statement (and the
+            # connection may be TLS). The most we can do is tell the
+            # kernel we'll read it straight through, so it reads
+            # ahead aggressively.
+            if _fadvise is not None:
+                _fadvise(f.fileno(), 0, 0, _FADV_SEQUENTIAL)
+            self._read_chunk(f, buf)
+            blob = _WriteBlob(conn, binary, buf)
+            self.oid = blob.oid
+            try:
+                while self._read_chunk(f, buf):
+                    blob.write(buf)
+            finally:
+                blob.close()
+
+    @staticmethod
+    def _read_chunk(f, buf):
+        count = f.readinto(buf)
+        if count < len(buf):
+            # Only happens at the end of the file.
+            del buf[count:]
+        return count
 
     def close(self):
         self.closed = True
 
 class _ReadBlob(object):
     closed = False
-    fetch_size = 1024 * 1024 * 9
+    fetch_size = DEFAULT_CHUNK_SIZE
 
-    def __init__(self, conn, oid):
+    def __init__(self, conn, oid, fetch_size=None):
+        if fetch_size:
+            self.fetch_size = _round_to_pages(fetch_size)
         self._cursor = conn.cursor()
         self.oid = oid
         self.offset = 0
+        try:
+            self._get_stmt = conn.lob_statement(self._cursor, 'lo_get')
+        except:
+            self._cursor.close()
+            raise
 
     def export(self, filename):
+        fetch_size = self.fetch_size
         with open(filename, 'wb') as f:
             while 1:
-                data = self.read(self.fetch_size)
-                if not data:
-                    break
+                data = self.read(fetch_size)
                 f.write(data)
+                # A short read means we've reached the end; don't
+                # spend another round trip to find that out.
+                if len(data) < fetch_size:
+                    break
         self.close()
 
     def read(self, size):
-        self._cursor.execute("SELECT lo_get(%(oid)s, %(off)s, %(cnt)s)",
-                             {'oid': self.oid, 'off': self.offset, 'cnt': size})
+        self._cursor.execute(self._get_stmt, (self.oid, self.offset, size))
         row = self._cursor.fetchone()
         data = row[0]
         self.offset += len(data)
@@ -113,12 +169,58 @@ class LobConnectionMixin(object):
     #: The driver module's ``Binary`` converter object.
     RSDriverBinary = None
 
-    def lobject(self, oid=0, mode='', new_oid=0, new_file=None):
+    #: Can the driver ``EXECUTE`` a server-side prepared statement
+    #: that takes parameters? pg8000 cannot
+    #: (https://github.com/mfenniak/pg8000/issues/132), but drivers that
+    #: interpolate parameters on the client, like psycopg2, can.
+    RSDriverCanPrepare = False
+
+    # {function: (direct statement, PREPARE statement, EXECUTE statement)}
+    _LOB_STATEMENTS = {
+        'lo_put': (
+            'SELECT lo_put(%s, %s, %s)',
+            'PREPARE rs_lo_put (OID, BIGINT, BYTEA) AS SELECT lo_put($1, $2, $3)',
+            'EXECUTE rs_lo_put(%s, %s, %s)',
+        ),
+        'lo_get': (
+            'SELECT lo_get(%s, %s, %s)',
+            'PREPARE rs_lo_get (OID, BIGINT, INT) AS SELECT lo_get($1, $2, $3)',
+            'EXECUTE rs_lo_get(%s, %s, %s)',
+        ),
+    }
+
+    def lob_statement(self, cursor, func):
+        """
+        Return the statement to use to call the large object *func*,
+        taking three positional parameters.
+
+        If possible, this is a prepared statement, created on first use
+        in this session.
+        """
+        stmt, prepare, execute = self._LOB_STATEMENTS[func]
+        if not self.RSDriverCanPrepare:
+            return stmt
+
+        # Share the cache used by prepared queries.
+        session_prep_stmts = CompiledQuery._stmt_cache_for_connection(self)
+        if prepare not in session_prep_stmts:
+            cursor.execute(prepare)
+            session_prep_stmts[prepare] = execute
+        return execute
+
+    def lobject(self, oid=0, mode='', new_oid=0, new_file=None, chunk_size=None):
+        """
+        Open a large object.
+
+        Unlike psycopg2, we accept a *chunk_size*: each chunk of the
+        object takes a round trip to the server to transfer. It is
+        rounded up to a whole number of large object pages.
+        """
         if oid == 0 and new_oid == 0 and mode == 'wb':
             if new_file:
                 # Upload the whole file right now.
-                return _UploadBlob(self, new_file, self.RSDriverBinary)
+                return _UploadBlob(self, new_file, self.RSDriverBinary, chunk_size)
             return _WriteBlob(self, self.RSDriverBinary)
         if oid != 0 and mode == 'rb':
-            return _ReadBlob(self, oid)
+            return _ReadBlob(self, oid, chunk_size)
         raise AssertionError("Unsupported params", dict(locals()))
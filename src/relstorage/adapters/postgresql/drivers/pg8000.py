@@ -19,7 +19,7 @@ pg8000 IDBDriver implementations.
 from __future__ import absolute_import
 from __future__ import print_function
 
-from collections import deque
+import re
 
 from zope.interface import implementer
 
@@ -38,10 +38,20 @@ __all__ = [
 ]
 
 
-class _tuple_deque(deque):
+# ``key=value``, where the value may be quoted (and then contain spaces).
+_DSN_PART = re.compile(r"""(\w+)=('[^']*'|"[^"]*"|\S+)""")
+
+
+def _buffers_rows_in_deque(driver_module):
+    # pg8000 1.17 replaced the ``_cached_rows`` deque of lists with
+    # a ``_row_iter``.
+    version = getattr(driver_module, '__version__', '0')
+    try:
+        major_minor = tuple(int(x) for x in version.split('.')[:2])
+    except ValueError: # pragma: no cover
+        return False
+    return major_minor < (1, 17)
 
-    def append(self, row): # pylint:disable=arguments-renamed
-        deque.append(self, tuple(row))
 
 class PG8000Compiler(Compiler):
 
@@ -78,26 +88,27 @@ class PG8000Driver(AbstractPostgreSQLDriver):
         # XXX: global side-effect!
         self.driver_module.paramstyle = 'pyformat'
 
-        # XXX: Testing. Can we remove?
-        self.disconnected_exceptions += (AttributeError,)
-
         # Sadly, pg8000 raises ProgrammingError when it can't
         # obtain a lock, making it hard to distinguish. We'll let other
         # clauses catch such exceptions.
         self.illegal_operation_exceptions = ()
         Binary = self.Binary
+        InterfaceError = self.driver_module.InterfaceError
+
+        def raise_if_closed(conn, ex):
+            # Older versions of pg8000 can raise AttributeError when
+            # used after the socket has been closed and discarded
+            # (``_sock`` is None). Turn that into what newer versions
+            # raise, which we treat as a disconnect. Any other
+            # AttributeError is a bug and propagates.
+            if conn is None or getattr(conn, '_sock', None) is None:
+                raise InterfaceError("connection is closed: %s" % (ex,))
 
         if getattr(self.driver_module, 'RSConnection', self) is self:
             class Cursor(self.driver_module.Cursor):
-                def __init__(self, conn):
-                    super(Cursor, self).__init__(conn)
-                    # pylint:disable=access-member-before-definition
-                    if hasattr(self, '_cached_rows'):
-                        # This went away in 1.17
-                        assert isinstance(self._cached_rows, deque)
-                        # Make sure rows are tuples, not lists.
-                        # BTrees don't like lists.
-                        self._cached_rows = _tuple_deque()
+                # Make sure the rows we return are tuples, not lists.
+                # BTrees don't like lists. We convert them as they're
+                # fetched, not all at once when they arrive.
 
                 @property
                 def connection(self):
@@ -109,14 +120,28 @@ class PG8000Driver(AbstractPostgreSQLDriver):
                     return self.execute(sql, stream=stream)
 
                 def execute(self, *args, **kwargs):
-                    result = super(Cursor, self).execute(*args, **kwargs)
+                    try:
+                        result = super(Cursor, self).execute(*args, **kwargs)
+                    except AttributeError as ex:
+                        raise_if_closed(self._c, ex)
+                        raise
                     if hasattr(self, '_row_iter'):
+                        # 1.17 and above. Everything is fetched through this
+                        # iterator, so let the (lazy, Python 3) map do the work.
                         # pylint:disable=attribute-defined-outside-init
-                        self._row_iter = iter([
-                            tuple(row) for row in self._row_iter
-                        ])
+                        self._row_iter = map(tuple, self._row_iter)
                     return result
 
+            cursor_class = Cursor
+            if _buffers_rows_in_deque(self.driver_module):
+                class ListRowCursor(Cursor):
+                    # Before 1.17, rows are popped from the ``_cached_rows``
+                    # deque in ``__next__``, which all the fetch methods use.
+                    def __next__(self):
+                        return tuple(super(ListRowCursor, self).__next__())
+                    next = __next__
+                cursor_class = ListRowCursor
+
             class Connection(LobConnectionMixin,
                              self.driver_module.Connection):
                 readonly = False
@@ -177,24 +202,47 @@ class PG8000Driver(AbstractPostgreSQLDriver):
                         self.py_types[list] = (BIGINT_ARRAY, int_array_out)
 
                 def cursor(self):
-                    return Cursor(self)
+                    return cursor_class(self)
+
+                def commit(self):
+                    try:
+                        super(Connection, self).commit()
+                    except AttributeError as ex:
+                        raise_if_closed(self, ex)
+                        raise
+
+                def rollback(self):
+                    try:
+                        super(Connection, self).rollback()
+                    except AttributeError as ex:
+                        raise_if_closed(self, ex)
+                        raise
 
             self.driver_module.RSConnection = Connection
 
         self._connect = self.driver_module.RSConnection
 
-    def connect(self, dsn, application_name=None): # pylint:disable=arguments-differ
+    # The last DSN we parsed, and its keywords. A storage
+    # always uses the same DSN, so that's all the caching we need.
+    _parsed_dsn = (None, None)
+
+    def _parse_dsn(self, dsn):
         # Parse the DSN into parts to pass as keywords.
         # We don't do this psycopg2 because a real DSN supports more options than
         # we do and we don't want to limit it.
-        kwds = {}
-        parts = dsn.split(' ')
-        for part in parts:
-            key, value = part.split('=')
-            value = value.strip("'\"")
-            key = 'database' if key == 'dbname' else key
-            value = int(value) if key == 'port' else value
-            kwds[key] = value
+        last_dsn, kwds = self._parsed_dsn
+        if dsn != last_dsn:
+            kwds = {}
+            for key, value in _DSN_PART.findall(dsn):
+                value = value.strip("'\"")
+                key = 'database' if key == 'dbname' else key
+                value = int(value) if key == 'port' else value
+                kwds[key] = value
+            self._parsed_dsn = (dsn, kwds)
+        return dict(kwds)
+
+    def connect(self, dsn, application_name=None): # pylint:disable=arguments-differ
+        kwds = self._parse_dsn(dsn)
         kwds['application_name'] = application_name
         conn = self._connect(**kwds)
         return conn
@@ -210,18 +258,27 @@ class PG8000Driver(AbstractPostgreSQLDriver):
                                application_name=None):
         conn = self.connect(dsn, application_name=application_name)
         cursor = self.cursor(conn)
-        # For the current transaction
         transaction_stmt = 'TRANSACTION %s %s %s' % (
             isolation,
             ', READ ONLY' if read_only else '',
             ', DEFERRABLE' if deferrable else ''
         )
-        cursor.execute('SET ' + transaction_stmt)
-        # For future transactions on this same connection.
+        # For future transactions on this same connection. We commit
+        # right away, so there's no need to also ``SET TRANSACTION``
+        # for the current one; it does nothing else. (pg8000 can't
+        # send both in one round trip.)
         # NOTE: This will probably not play will with things like pgbouncer.
         # See http://initd.org/psycopg/docs/connection.html#connection.set_session
-        cursor.execute('SET SESSION CHARACTERISTICS AS ' + transaction_stmt)
-        conn.commit()
+        if hasattr(conn, 'autocommit'):
+            # Don't spend round trips on BEGIN and COMMIT around it.
+            conn.autocommit = True
+            try:
+                cursor.execute('SET SESSION CHARACTERISTICS AS ' + transaction_stmt)
+            finally:
+                conn.autocommit = False
+        else: # pragma: no cover
+            cursor.execute('SET SESSION CHARACTERISTICS AS ' + transaction_stmt)
+            conn.commit()
         conn.readonly = read_only
         return conn
 
@@ -237,6 +237,7 @@ class GeventPsycopg2Driver(GeventDriverMixin, Psycopg2Driver):
                                              LobConnectionMixin,
                                              Base):
                 RSDriverBinary = self.Binary
+                RSDriverCanPrepare = True
                 _in_critical_phase = False
 
                 def enter_critical_phase_until_transaction_end(self):
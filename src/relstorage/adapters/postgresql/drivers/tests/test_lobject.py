@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for _lobject.py.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+from relstorage.tests import TestCase
+
+from .. import _lobject
+
+
+class MockLargeObjectCursor(object):
+    # Implements just enough of lo_from_bytea, lo_put and lo_get
+    # to store a single large object.
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._row = None
+
+    def execute(self, stmt, params=None):
+        self.conn.executed.append(stmt)
+        if stmt.startswith('PREPARE'):
+            self._row = None
+        elif 'lo_from_bytea' in stmt:
+            self.conn.data = bytearray(params['data'])
+            self._row = (42,)
+        elif 'lo_put' in stmt:
+            oid, offset, data = params
+            assert oid == 42
+            self.conn.data[offset:offset + len(data)] = data
+            self._row = ('',)
+        elif 'lo_get' in stmt:
+            oid, offset, count = params
+            assert oid == 42
+            self._row = (bytes(self.conn.data[offset:offset + count]),)
+        else:
+            raise AssertionError(stmt)
+
+    def fetchone(self):
+        return self._row
+
+    def close(self):
+        "Does nothing"
+
+
+class MockConnection(_lobject.LobConnectionMixin):
+    RSDriverBinary = bytes
+
+    def __init__(self):
+        self.executed = []
+        self.data = None
+
+    def cursor(self):
+        return MockLargeObjectCursor(self)
+
+
+class TestLobConnectionMixin(TestCase):
+
+    def setUp(self):
+        super(TestLobConnectionMixin, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def _write_file(self, data):
+        fn = os.path.join(self.temp_dir, 'upload')
+        with open(fn, 'wb') as f:
+            f.write(data)
+        return fn
+
+    def _read_file(self, fn):
+        with open(fn, 'rb') as f:
+            return f.read()
+
+    def _check_upload(self, data, fetch_size, conn=None):
+        conn = conn if conn is not None else MockConnection()
+        # Smaller than chunk_size allows, so change the class default
+        # for the duration of the test.
+        upload = _lobject._UploadBlob
+        self.addCleanup(setattr, upload, 'fetch_size', upload.fetch_size)
+        upload.fetch_size = fetch_size
+        blob = conn.lobject(0, 'wb', 0, self._write_file(data))
+        self.assertEqual(blob.oid, 42)
+        self.assertEqual(bytes(conn.data), data)
+        return conn.executed
+
+    def _check_export(self, data, fetch_size, conn=None):
+        conn = conn if conn is not None else MockConnection()
+        conn.data = bytearray(data)
+        blob = conn.lobject(42, 'rb')
+        blob.fetch_size = fetch_size
+        fn = os.path.join(self.temp_dir, 'download')
+        blob.export(fn)
+        self.assertTrue(blob.closed)
+        self.assertEqual(self._read_file(fn), data)
+        return conn.executed
+
+    def test_upload_small_is_one_statement(self):
+        executed = self._check_upload(b'abc', 10)
+        self.assertEqual(len(executed), 1)
+
+    def test_upload_empty(self):
+        executed = self._check_upload(b'', 10)
+        self.assertEqual(len(executed), 1)
+
+    def test_upload_multiple_chunks(self):
+        executed = self._check_upload(b'abcdefghij' * 2 + b'k', 10)
+        self.assertEqual(len(executed), 3)
+
+    def test_upload_whole_pages_with_default_size(self):
+        # The buffer is sized to the file, which exactly fills it.
+        conn = MockConnection()
+        data = b'x' * (_lobject.LOBLKSIZE * 2)
+        blob = conn.lobject(0, 'wb', 0, self._write_file(data))
+        self.assertEqual(blob.oid, 42)
+        self.assertEqual(bytes(conn.data), data)
+        self.assertEqual(len(conn.executed), 1)
+
+    def test_export_small_is_one_statement(self):
+        executed = self._check_export(b'abc', 10)
+        self.assertEqual(len(executed), 1)
+
+    def test_export_multiple_chunks(self):
+        executed = self._check_export(b'abcdefghij' * 2 + b'k', 10)
+        self.assertEqual(len(executed), 3)
+
+    def test_export_exact_multiple_of_chunks(self):
+        executed = self._check_export(b'abcdefghij' * 2, 10)
+        self.assertEqual(len(executed), 3)
+
+    def test_prepared_statements(self):
+        conn = MockConnection()
+        conn.RSDriverCanPrepare = True
+        executed = self._check_upload(b'abcdefghij' * 2 + b'k', 10, conn)
+        self.assertEqual(len(executed), 4)
+        self.assertTrue(executed[1].startswith('PREPARE rs_lo_put'))
+        self.assertEqual(executed[2], 'EXECUTE rs_lo_put(%s, %s, %s)')
+        self.assertEqual(executed[3], 'EXECUTE rs_lo_put(%s, %s, %s)')
+
+        # Prepared once per connection.
+        del conn.executed[:]
+        executed = self._check_upload(b'abcdefghij' * 2 + b'k', 10, conn)
+        self.assertEqual(len(executed), 3)
+        self.assertNotIn('PREPARE', ''.join(executed))
+
+        del conn.executed[:]
+        executed = self._check_export(b'abcdefghij' * 2 + b'k', 10, conn)
+        self.assertEqual(len(executed), 4)
+        self.assertTrue(executed[0].startswith('PREPARE rs_lo_get'))
+        self.assertEqual(executed[1], 'EXECUTE rs_lo_get(%s, %s, %s)')
+
+    def test_chunk_size_rounds_to_pages(self):
+        conn = MockConnection()
+        fn = self._write_file(b'x' * 5000)
+        blob = conn.lobject(0, 'wb', 0, fn, chunk_size=3000)
+        self.assertEqual(blob.fetch_size, 4096)
+        # One chunk in the create, one more with lo_put
+        self.assertEqual(len(conn.executed), 2)
+        self.assertEqual(bytes(conn.data), b'x' * 5000)
+
+        blob = conn.lobject(42, 'rb', chunk_size=1)
+        self.assertEqual(blob.fetch_size, _lobject.LOBLKSIZE)
+        # Only this instance's size changed; the class default is
+        # still the fallback when no chunk size is given (the mover
+        # always gives one).
+        self.assertEqual(_lobject._ReadBlob.fetch_size, _lobject.DEFAULT_CHUNK_SIZE)
+
+    def test_upload_restores_class_fetch_size(self):
+        self._check_upload(b'abc', 10)
+        self.doCleanups()
+        self.assertEqual(_lobject._UploadBlob.fetch_size, _lobject.DEFAULT_CHUNK_SIZE)
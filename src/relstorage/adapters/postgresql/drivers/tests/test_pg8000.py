@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from relstorage.tests import TestCase
+from relstorage.tests import mock
+
+from .. import pg8000
+
+
+class TestPG8000Driver(TestCase):
+
+    def _makeOne(self):
+        try:
+            return pg8000.PG8000Driver()
+        except ImportError as e:
+            self.skipTest(e)
+
+    def test_parse_dsn(self):
+        driver = self._makeOne()
+        kwds = driver._parse_dsn(
+            "dbname=relstoragetest user='relstorage test' password=\"a=b\" "
+            "host=localhost port=5433"
+        )
+        self.assertEqual(kwds, {
+            'database': 'relstoragetest',
+            'user': 'relstorage test',
+            'password': 'a=b',
+            'host': 'localhost',
+            'port': 5433,
+        })
+
+    def test_parse_dsn_cached(self):
+        driver = self._makeOne()
+        dsn = "dbname=relstoragetest user=relstoragetest"
+        kwds = driver._parse_dsn(dsn)
+        # We get a copy that we can change.
+        kwds['application_name'] = 'test'
+        self.assertEqual(driver._parse_dsn(dsn), {
+            'database': 'relstoragetest',
+            'user': 'relstoragetest',
+        })
+        self.assertIs(driver._parsed_dsn[0], dsn)
+
+        driver._parse_dsn("dbname=other")
+        self.assertEqual(driver._parsed_dsn, ("dbname=other", {'database': 'other'}))
+
+
+class TestPG8000ClosedConnection(TestCase):
+    # Old versions of pg8000 raise AttributeError when used after
+    # the socket is gone; only that is a disconnect.
+
+    def setUp(self):
+        super(TestPG8000ClosedConnection, self).setUp()
+        try:
+            self.driver = pg8000.PG8000Driver()
+        except ImportError as e:
+            self.skipTest(e)
+        self.module = self.driver.driver_module
+
+    def _makeConnection(self, sock):
+        # Don't actually connect.
+        Connection = self.module.RSConnection
+        conn = Connection.__new__(Connection)
+        conn._sock = sock
+        return conn
+
+    def _check(self, kind, method_name, call):
+        with mock.patch.object(kind, method_name,
+                               side_effect=AttributeError('no attribute')):
+            conn = self._makeConnection(None)
+            with self.assertRaises(self.module.InterfaceError):
+                call(conn)
+
+            conn = self._makeConnection(object())
+            with self.assertRaises(AttributeError) as exc:
+                call(conn)
+            self.assertNotIsInstance(exc.exception, self.module.InterfaceError)
+            self.assertEqual(str(exc.exception), 'no attribute')
+
+    def test_execute(self):
+        self._check(self.module.Cursor, 'execute',
+                    lambda conn: conn.cursor().execute('SELECT 1'))
+
+    def test_commit(self):
+        self._check(self.module.Connection, 'commit',
+                    lambda conn: conn.commit())
+
+    def test_rollback(self):
+        self._check(self.module.Connection, 'rollback',
+                    lambda conn: conn.rollback())
@@ -18,6 +18,7 @@ from __future__ import absolute_import, print_function
 import io
 import os
 import struct
+from array import array
 
 from zope.interface import implementer
 
@@ -26,6 +27,9 @@ from ..interfaces import IObjectMover
 from ..mover import AbstractObjectMover
 from ..mover import RowBatcherStoreTemps
 from ..mover import metricmethod_sampled
+from ..sql.query import CompiledQuery
+from .drivers._lobject import DEFAULT_CHUNK_SIZE as LOB_CHUNK_SIZE
+from .drivers._lobject import LobConnectionMixin
 
 class PostgreSQLRowBatcherStoreTemps(RowBatcherStoreTemps):
     generic_suffix = """
@@ -41,6 +45,10 @@ class PostgreSQLObjectMover(AbstractObjectMover):
 
     def __init__(self, *args, **kwargs):
         super(PostgreSQLObjectMover, self).__init__(*args, **kwargs)
+        # When large objects are emulated with SQL, each chunk is a
+        # round trip, so a smaller blob_chunk_size (the default is
+        # 1MB) would only cost us more of them.
+        self.lob_chunk_size = max(self.blob_chunk_size, LOB_CHUNK_SIZE)
         if not self.driver.supports_copy:
             batcher = PostgreSQLRowBatcherStoreTemps(self.keep_history,
                                                      self.driver.Binary,
@@ -98,28 +106,43 @@ class PostgreSQLObjectMover(AbstractObjectMover):
 
         AbstractObjectMover.on_store_opened(self, cursor, restart)
 
+    _restore_hp_suffix = """
+    ON CONFLICT (zoid, tid) DO UPDATE SET
+        tid = excluded.tid,
+        prev_tid = excluded.prev_tid,
+        md5 = excluded.md5,
+        state_size = excluded.state_size,
+        state = excluded.state
+    """
+
+    _restore_hf_suffix = """
+    ON CONFLICT (zoid) DO UPDATE SET
+        tid = excluded.tid,
+        state_size = excluded.state_size,
+        state = excluded.state
+    """
+
+    def make_restore_batcher(self, cursor, row_limit):
+        if self.driver.supports_copy:
+            return RestoreCopyBatcher(cursor, row_limit,
+                                      self.keep_history,
+                                      self._compute_md5sum)
+        return self.make_batcher(cursor, row_limit)
+
     @metricmethod_sampled
     def restore(self, cursor, batcher, oid, tid, data):
         """Store an object directly, without conflict detection.
 
         Used for copying transactions into this database.
         """
+        if isinstance(batcher, RestoreCopyBatcher):
+            batcher.add(oid, tid, data)
+            return
+
         if self.keep_history:
-            suffix = """
-            ON CONFLICT (zoid, tid) DO UPDATE SET
-                tid = excluded.tid,
-                prev_tid = excluded.prev_tid,
-                md5 = excluded.md5,
-                state_size = excluded.state_size,
-                state = excluded.state
-            """
+            suffix = self._restore_hp_suffix
         else:
-            suffix = """
-            ON CONFLICT (zoid) DO UPDATE SET
-                tid = excluded.tid,
-                state_size = excluded.state_size,
-                state = excluded.state
-            """
+            suffix = self._restore_hf_suffix
         self._generic_restore(batcher, oid, tid, data,
                               command='INSERT', suffix=suffix)
 
@@ -141,7 +164,12 @@ class PostgreSQLObjectMover(AbstractObjectMover):
         assert len(rows) == 1
         loid, = rows[0]
 
-        blob = cursor.connection.lobject(loid, 'rb')
+        conn = cursor.connection
+        if isinstance(conn, LobConnectionMixin):
+            # Emulated with SQL; each chunk is a round trip.
+            blob = conn.lobject(loid, 'rb', chunk_size=self.lob_chunk_size)
+        else:
+            blob = conn.lobject(loid, 'rb')
         # Use the native psycopg2 blob export functionality
         blob.export(filename)
         blob.close()
@@ -204,7 +232,11 @@ class PostgreSQLObjectMover(AbstractObjectMover):
         # issue.
 
         # Create and upload the blob, getting a large object identifier.
-        blob = cursor.connection.lobject(0, 'wb', 0, filename)
+        conn = cursor.connection
+        if isinstance(conn, LobConnectionMixin):
+            blob = conn.lobject(0, 'wb', 0, filename, chunk_size=self.lob_chunk_size)
+        else:
+            blob = conn.lobject(0, 'wb', 0, filename)
         blob.close()
 
         # Now put it into our blob_chunk table.
@@ -375,3 +407,243 @@ class TempStoreCopyBuffer(io.BufferedIOBase):
             len_data
         )
         buf.extend(data)
+
+
+try:
+    array('q')
+except ValueError: # pragma: no cover
+    # Python 2 has no 64-bit array type code.
+    def _int64_array():
+        return []
+else:
+    def _int64_array():
+        return array('q')
+
+
+class RestoreCopyBatcher(object):
+    """
+    Accumulates the rows given to :meth:`PostgreSQLObjectMover.restore`
+    and sends them to the database using a binary ``COPY``.
+
+    ``COPY`` can't resolve conflicts, so the rows are first copied
+    into the ``temp_restore`` table and then moved into
+    ``object_state`` with a single upsert. Compared to the generic
+    :class:`~relstorage.adapters.batch.RowBatcher`, this avoids
+    sending (and having the server parse) a large ``VALUES`` list for
+    each flush.
+    """
+
+    # How many bytes of state we can queue before flushing.
+    size_limit = 16 * 1024 * 1024
+
+    CREATE_HP_STMT = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS temp_restore (
+        zoid        BIGINT NOT NULL,
+        tid         BIGINT NOT NULL,
+        md5         CHAR(32),
+        state       BYTEA
+    ) ON COMMIT DROP
+    """
+
+    CREATE_HF_STMT = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS temp_restore (
+        zoid        BIGINT NOT NULL,
+        tid         BIGINT NOT NULL,
+        state       BYTEA
+    ) ON COMMIT DROP
+    """
+
+    COPY_HP_STMT = "COPY temp_restore (zoid, tid, md5, state) FROM STDIN WITH (FORMAT binary)"
+    COPY_HF_STMT = "COPY temp_restore (zoid, tid, state) FROM STDIN WITH (FORMAT binary)"
+
+    # Emptying the temporary table as we read from it lets us
+    # flush as many times as needed in a single transaction.
+    MOVE_HP_STMT = """
+    WITH restored AS (
+        DELETE FROM temp_restore
+        RETURNING zoid, tid, md5, state
+    )
+    INSERT INTO object_state (zoid, tid, prev_tid, md5, state_size, state)
+    SELECT zoid, tid,
+           COALESCE((SELECT c.tid FROM current_object c WHERE c.zoid = restored.zoid), 0),
+           md5, COALESCE(length(state), 0), state
+    FROM restored
+    """ + PostgreSQLObjectMover._restore_hp_suffix
+
+    # History free can only delete the entire record, which
+    # we signal with a NULL state.
+    MOVE_HF_STMT = """
+    WITH restored AS (
+        DELETE FROM temp_restore
+        RETURNING zoid, tid, state
+    ), deleted AS (
+        DELETE FROM object_state
+        WHERE zoid IN (SELECT zoid FROM restored WHERE state IS NULL)
+    )
+    INSERT INTO object_state (zoid, tid, state_size, state)
+    SELECT zoid, tid, length(state), state
+    FROM restored
+    WHERE state IS NOT NULL
+    """ + PostgreSQLObjectMover._restore_hf_suffix
+
+    # The move statements are the same every time, so we prepare them
+    # once per connection. The prepared statement outlives the
+    # temporary table; PostgreSQL finds the new one when the
+    # statement is next executed.
+    PREPARE_HP_STMT = 'PREPARE rs_restore_move_hp AS ' + MOVE_HP_STMT
+    PREPARE_HF_STMT = 'PREPARE rs_restore_move_hf AS ' + MOVE_HF_STMT
+    EXECUTE_HP_STMT = 'EXECUTE rs_restore_move_hp'
+    EXECUTE_HF_STMT = 'EXECUTE rs_restore_move_hf'
+
+    # Each tuple begins with its column count, and each column
+    # is a 32-bit length (-1 for NULL) followed by the data.
+    # (zoid, tid, md5, state)
+    _HP_ROW = struct.Struct("!hiqiq" "i32si")
+    _HP_ROW_NULL = struct.Struct("!hiqiq" "ii")
+    # (zoid, tid, state)
+    _HF_ROW = struct.Struct("!hiqiq" "i")
+
+    def __init__(self, cursor, row_limit, keep_history, digester):
+        self.cursor = cursor
+        self.row_limit = row_limit
+        self.keep_history = keep_history
+        self._digester = digester
+        self._created = False
+
+        self.total_rows_inserted = 0
+        self.total_size_inserted = 0
+        self.size_added = 0
+        # The queued rows are kept in parallel arrays, the integers
+        # unboxed, instead of as a tuple per row.
+        self._oids = _int64_array()
+        self._tids = _int64_array()
+        self._states = []
+        # {rowkey: index in the arrays}. As with the RowBatcher,
+        # adding the same row again replaces it.
+        self._row_index = {}
+
+        if keep_history:
+            self._create_stmt = self.CREATE_HP_STMT
+            self._copy_stmt = self.COPY_HP_STMT
+            self._move_stmt = self.MOVE_HP_STMT
+            self._prepare_stmt = self.PREPARE_HP_STMT
+            self._execute_stmt = self.EXECUTE_HP_STMT
+        else:
+            self._create_stmt = self.CREATE_HF_STMT
+            self._copy_stmt = self.COPY_HF_STMT
+            self._move_stmt = self.MOVE_HF_STMT
+            self._prepare_stmt = self.PREPARE_HF_STMT
+            self._execute_stmt = self.EXECUTE_HF_STMT
+
+    def __repr__(self):
+        return "<%s at %x tins=%d prows=%d>" % (
+            self.__class__.__name__,
+            id(self),
+            self.total_rows_inserted,
+            len(self._states),
+        )
+
+    def add(self, oid_int, tid_int, data):
+        if self.keep_history:
+            rowkey = (oid_int, tid_int)
+        else:
+            rowkey = oid_int
+            if not data:
+                data = None
+        index = self._row_index.get(rowkey)
+        if index is None:
+            self._row_index[rowkey] = len(self._states)
+            self._oids.append(oid_int)
+            self._tids.append(tid_int)
+            self._states.append(data)
+        else:
+            self._tids[index] = tid_int
+            self._states[index] = data
+        self.size_added += len(data) if data else 0
+        if len(self._states) >= self.row_limit or self.size_added >= self.size_limit:
+            self.flush()
+
+    def flush(self):
+        """
+        Send all queued rows to the database.
+
+        Returns the number of rows sent.
+        """
+        count = len(self._states)
+        if not count:
+            return 0
+
+        cursor = self.cursor
+        if not self._created:
+            cursor.execute(self._create_stmt)
+            self._created = True
+
+        cursor.copy_expert(self._copy_stmt, io.BytesIO(self._encode()))
+        cursor.execute(self._move_statement(cursor))
+
+        self._row_index.clear()
+        del self._oids[:]
+        del self._tids[:]
+        del self._states[:]
+        self.total_rows_inserted += count
+        self.total_size_inserted += self.size_added
+        self.size_added = 0
+        return count
+
+    def _move_statement(self, cursor):
+        # Must be called after the temporary table exists.
+        session_prep_stmts = CompiledQuery._stmt_cache_for_connection(cursor.connection)
+        if self._prepare_stmt not in session_prep_stmts:
+            cursor.execute(self._prepare_stmt)
+            session_prep_stmts[self._prepare_stmt] = self._execute_stmt
+        return self._execute_stmt
+
+    def _encode(self):
+        header = TempStoreCopyBuffer.HEADER
+        trailer = TempStoreCopyBuffer.TRAILER
+        states = self._states
+        rows = zip(self._oids, self._tids, states)
+        if self.keep_history:
+            row = self._HP_ROW
+            null_row = self._HP_ROW_NULL
+        else:
+            row = null_row = self._HF_ROW
+
+        # Size the buffer exactly, then fill it in place.
+        size = len(header) + len(trailer)
+        for data in states:
+            size += null_row.size if data is None else row.size + len(data)
+        buf = bytearray(size)
+        buf[:len(header)] = header
+        pos = len(header)
+
+        pack_row = row.pack_into
+        row_size = row.size
+        if self.keep_history:
+            digester = self._digester
+            pack_null = null_row.pack_into
+            null_size = null_row.size
+            for oid_int, tid_int, data in rows:
+                if data is None:
+                    pack_null(buf, pos, 4, 8, oid_int, 8, tid_int, -1, -1)
+                    pos += null_size
+                    continue
+                md5 = digester(data)
+                if not isinstance(md5, bytes):
+                    md5 = md5.encode('ascii')
+                pack_row(buf, pos, 4, 8, oid_int, 8, tid_int, 32, md5, len(data))
+                pos += row_size
+                buf[pos:pos + len(data)] = data
+                pos += len(data)
+        else:
+            for oid_int, tid_int, data in rows:
+                if data is None:
+                    pack_row(buf, pos, 3, 8, oid_int, 8, tid_int, -1)
+                    pos += row_size
+                    continue
+                pack_row(buf, pos, 3, 8, oid_int, 8, tid_int, len(data))
+                pos += row_size
+                buf[pos:pos + len(data)] = data
+                pos += len(data)
+        buf[pos:] = trailer
+        return buf
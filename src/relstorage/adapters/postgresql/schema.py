@@ -17,6 +17,9 @@ Database schema installers
 from __future__ import absolute_import
 from __future__ import print_function
 
+import re
+from operator import itemgetter
+
 from zope.interface import implementer
 
 from ..connmanager import connection_callback
@@ -25,6 +28,9 @@ from ..schema import AbstractSchemaInstaller
 
 logger = __import__('logging').getLogger(__name__)
 
+_HEX_CHECKSUM = re.compile(r'^[0-9a-f]+$')
+_PROC_NAME = re.compile(r'^[a-z_][a-z0-9_]*$')
+
 class _StoredFunction(object):
     """
     Represents a function stored in the database.
@@ -81,6 +87,9 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
     database_type = 'postgresql'
 
     _PROCEDURES = {} # Caching of proc files.
+    # {(proc name, unformatted source): checksum}. The generic procs
+    # are the same for both history modes.
+    _PROC_CHECKSUMS = {}
 
     def __init__(self, options, connmanager, runner, locker):
         self.options = options
@@ -102,11 +111,15 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
         else:
             object_state_join = ""
             object_state_name = 'cur'
+        checksums = self._PROC_CHECKSUMS
+        for name, value in procs.items():
+            if (name, value) not in checksums:
+                checksums[(name, value)] = self._checksum_for_str(value)
         return {
             name: _StoredFunction(
                 name,
                 None,
-                self._checksum_for_str(value),
+                checksums[(name, value)],
                 value.format(
                     CURRENT_OBJECT=current_object,
                     OBJECT_STATE_JOIN=object_state_join,
@@ -118,14 +131,57 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
         }
 
     def get_database_name(self, cursor):
-        cursor.execute("SELECT current_database()")
-        row, = cursor.fetchall()
-        name, = row
-        return self._metadata_to_native_str(name)
+        names = self.__snapshot_names('db')
+        if names is None:
+            cursor.execute("SELECT current_database()")
+            names = self.__native_names_only(cursor)
+        name, = names
+        return name
+
+    # While we're preparing the schema, the catalog queries below
+    # are answered from a single query made up front (see
+    # ``_list_all``) instead of each costing a round trip. Each kind
+    # of name can be taken from the snapshot only once; after that
+    # we may have created objects of that kind, so we go back to the
+    # database.
+    _catalog_snapshot = None
+
+    def _list_all(self, cursor):
+        """
+        Return a dictionary from a short tag (``'tab'``, ``'seq'``,
+        ``'lang'``, ``'trg'`` and ``'db'``) to the frozenset of
+        names of that kind of object in the database, all in one query.
+        """
+        cursor.execute("""
+        SELECT 'tab', tablename FROM pg_tables
+        UNION ALL
+        SELECT 'seq', relname FROM pg_class WHERE relkind = 'S'
+        UNION ALL
+        SELECT 'lang', lanname FROM pg_catalog.pg_language
+        UNION ALL
+        SELECT 'trg', tgname FROM pg_trigger
+        UNION ALL
+        SELECT 'db', current_database()
+        """)
+        native = self._metadata_to_native_str
+        result = {'tab': set(), 'seq': set(), 'lang': set(), 'trg': set(), 'db': set()}
+        for kind, name in cursor.fetchall():
+            result[native(kind)].add(native(name))
+        return {kind: frozenset(names) for kind, names in result.items()}
+
+    def __snapshot_names(self, kind):
+        snapshot = self._catalog_snapshot
+        if snapshot is None:
+            return None
+        return snapshot.pop(kind, None)
 
     @connection_callback(inherit=AbstractSchemaInstaller._prepare_with_connection)
     def _prepare_with_connection(self, conn, cursor):
-        super(PostgreSQLSchemaInstaller, self)._prepare_with_connection(conn, cursor)
+        self._catalog_snapshot = self._list_all(cursor)
+        try:
+            super(PostgreSQLSchemaInstaller, self)._prepare_with_connection(conn, cursor)
+        finally:
+            self._catalog_snapshot = None
 
         # Do we need to merge blob chunks?
         if not self.options.shared_blob_dir:
@@ -146,40 +202,52 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
 
     def create_triggers(self, cursor):
         triggers = self.list_triggers(cursor)
-        __traceback_info__ = triggers, self.list_tables(cursor), self.get_database_name(cursor)
+        # The tables are in the caller's traceback info.
+        __traceback_info__ = triggers, self.get_database_name(cursor)
         if 'blob_chunk_delete' not in triggers:
             self.__install_triggers(cursor)
 
     def __native_names_only(self, cursor):
-        native = self._metadata_to_native_str
-        return frozenset([
-            native(name)
-            for (name,) in cursor.fetchall()
-        ])
+        return frozenset(map(
+            self._metadata_to_native_str,
+            map(itemgetter(0), cursor.fetchall())
+        ))
 
     def list_tables(self, cursor):
-        cursor.execute("SELECT tablename FROM pg_tables")
-        return self.__native_names_only(cursor)
+        names = self.__snapshot_names('tab')
+        if names is None:
+            cursor.execute("SELECT tablename FROM pg_tables")
+            names = self.__native_names_only(cursor)
+        return names
 
     def list_sequences(self, cursor):
-        cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'S'")
-        return self.__native_names_only(cursor)
+        names = self.__snapshot_names('seq')
+        if names is None:
+            cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'S'")
+            names = self.__native_names_only(cursor)
+        return names
 
     def list_views(self, cursor):
         cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'v'")
         return self.__native_names_only(cursor)
 
     def list_languages(self, cursor):
-        cursor.execute("SELECT lanname FROM pg_catalog.pg_language")
-        return self.__native_names_only(cursor)
+        names = self.__snapshot_names('lang')
+        if names is None:
+            cursor.execute("SELECT lanname FROM pg_catalog.pg_language")
+            names = self.__native_names_only(cursor)
+        return names
 
     def __install_languages(self, cursor):
         if 'plpgsql' not in self.list_languages(cursor):
             cursor.execute("CREATE LANGUAGE plpgsql")
 
-    def list_procedures(self, cursor):
+    def list_procedures(self, cursor, names=None):
         """
         Returns {procedure name: _StoredFunction}.
+
+        If *names* is given, only procedures with those names
+        (ignoring case) are returned.
         """
         # The description is populated with
         # ``COMMENT ON FUNCTION <name>(<args>) IS 'comment'``.
@@ -194,6 +262,17 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
         LEFT JOIN pg_description As d ON (d.objoid = p.oid)
         WHERE n.nspname = 'public'
         """
+        if names is not None:
+            names = sorted({name.lower() for name in names})
+            if not names:
+                return {}
+            # These are our own procedure names, so we can embed them
+            # in the statement; pg8000 can't bind a list of strings
+            # (it thinks all lists are BIGINT[]).
+            assert all(_PROC_NAME.match(name) for name in names), names
+            stmt += " AND lower(p.proname) IN (%s)" % (
+                ', '.join("'%s'" % name for name in names)
+            )
 
         cursor.execute(stmt)
         res = {}
@@ -232,10 +311,9 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
 
         expected = self.procedures
 
-        installed = self.list_procedures(cursor)
-        # If the database evolves over tiem, there could be
+        # If the database evolves over time, there could be
         # extra procs still there that we don't care about.
-        installed = {k: v for k, v in installed.items() if k in expected}
+        installed = self.list_procedures(cursor, expected)
         if installed != expected:
             logger.info(
                 "Procedures incorrect, will reinstall. "
@@ -260,20 +338,31 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
         # of this transaction (just like pg_dump.)
         cursor.execute('SET LOCAL check_function_bodies = off')
 
-        for proc_name, stored_func in self.procedures.items():
-            __traceback_info__ = proc_name, self.keep_history
-            proc_source = stored_func.create
-            # All definitions should be written with 'CREATE OR REPLACE'
-            # so we don't need to bother with 'DROP'. Though, if the return
-            # type changes, we can't REPLACE.
-            cursor.execute(proc_source)
+        # All definitions should be written with 'CREATE OR REPLACE'
+        # so we don't need to bother with 'DROP'. Though, if the return
+        # type changes, we can't REPLACE.
+        if self.driver.supports_multiple_statement_execute:
+            # Send them all in one round trip. Each source file ends with
+            # its own semicolon. They're all in the same transaction,
+            # so a failure in any one of them aborts the whole thing
+            # just as it would if we sent them one at a time.
+            __traceback_info__ = sorted(self.procedures), self.keep_history
+            cursor.execute('\n'.join(
+                stored_func.create
+                for stored_func in self.procedures.values()
+            ))
+        else:
+            for proc_name, stored_func in self.procedures.items():
+                __traceback_info__ = proc_name, self.keep_history
+                cursor.execute(stored_func.create)
 
         # Update checksums
         # Postgres < 10 requires the signature to identify the function;
         # after that it's optional if the function isn't overloaded.
         # Rather than try to parse the signature from the file ourself, we
         # let the database do it and then ask it.
-        for db_proc in self.list_procedures(cursor).values():
+        comments = []
+        for db_proc in self.list_procedures(cursor, self.procedures).values():
             # db_proc will have the signature but perhaps not the checksum.
             try:
                 disk_proc = self.procedures[db_proc.name]
@@ -288,16 +377,27 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
             db_proc.checksum = disk_proc.checksum
 
             # For pg8000 we can't use a parameter here (because it prepares?)
-            comment = "COMMENT ON FUNCTION %s IS '%s'" % (
+            # The checksums come from hexdigest(), so they need no quoting.
+            assert _HEX_CHECKSUM.match(db_proc.checksum), db_proc.checksum
+            comments.append("COMMENT ON FUNCTION %s IS '%s';" % (
                 str(db_proc), db_proc.checksum
-            )
+            ))
+
+        if not comments:
+            return
+        if self.driver.supports_multiple_statement_execute:
+            comments = ['\n'.join(comments)]
+        for comment in comments:
             __traceback_info__ = comment
             cursor.execute(comment)
 
 
     def list_triggers(self, cursor):
-        cursor.execute("SELECT tgname FROM pg_trigger")
-        return self.__native_names_only(cursor)
+        names = self.__snapshot_names('trg')
+        if names is None:
+            cursor.execute("SELECT tgname FROM pg_trigger")
+            names = self.__native_names_only(cursor)
+        return names
 
     def __install_triggers(self, cursor):
         stmt = """
@@ -308,13 +408,13 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
         """
         cursor.execute(stmt)
 
-    def drop_all(self):
-        def delete_blob_chunk(_conn, cursor):
-            if 'blob_chunk' in self.list_tables(cursor):
-                # Trigger deletion of blob OIDs.
-                cursor.execute("DELETE FROM blob_chunk")
-        self.connmanager.open_and_call(delete_blob_chunk)
-        super(PostgreSQLSchemaInstaller, self).drop_all()
+    def _drop_all(self, _conn, cursor):
+        # Do this in the same connection (and transaction) as
+        # dropping the tables; opening a connection isn't free.
+        if 'blob_chunk' in self.list_tables(cursor):
+            # Trigger deletion of blob OIDs.
+            cursor.execute("DELETE FROM blob_chunk")
+        super(PostgreSQLSchemaInstaller, self)._drop_all(_conn, cursor)
 
     def _create_pack_lock(self, cursor):
         return
@@ -386,29 +486,28 @@ class PostgreSQLSchemaInstaller(AbstractSchemaInstaller):
             SELECT DISTINCT chunk
             FROM blob_chunk;
             """)
+            # Each batch is a single statement that returns a single row
+            # (the number of chunks unlinked), no matter how many
+            # chunks there are.
+            batch_size = 1000
             while True:
                 cursor.execute("""
-                DO $$BEGIN
-                    PERFORM lo_unlink(chunk)
-                    FROM temp_zap_chunk
-                    ORDER BY chunk
-                    LIMIT 1000;
-
+                WITH batch AS (
                     DELETE FROM temp_zap_chunk
                     WHERE chunk IN (
                        SELECT chunk
                        FROM temp_zap_chunk
                        ORDER BY chunk
-                       LIMIT 1000
-                    );
-                END
-                $$ LANGUAGE plpgsql;
-                SELECT MIN(chunk) FROM temp_zap_chunk;
-                """)
+                       LIMIT %d
+                    )
+                    RETURNING chunk
+                )
+                SELECT COUNT(lo_unlink(chunk)) FROM batch
+                """ % (batch_size,))
                 cnt, = cursor.fetchone()
-                logger.info("Unlinked 1000 blob chunks. More? %s", bool(cnt))
+                logger.info("Unlinked %d blob chunks. More? %s", cnt, cnt == batch_size)
                 self.driver.commit(conn)
-                if not cnt:
+                if cnt < batch_size:
                     # Now we must truncate because the trigger won't let
                     # delete's happen.
                     cursor.execute('TRUNCATE TABLE blob_chunk;')
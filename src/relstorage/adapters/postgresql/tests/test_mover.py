@@ -100,3 +100,128 @@ class TestPostgreSQLObjectMover(TestCase):
                 'EXECUTE rs_prep_stmt'
             )
         )
+
+    def test_make_restore_batcher_no_copy(self):
+        from relstorage.tests import MockCursor
+        inst = self._makeOne(keep_history=False)
+        batcher = inst.make_restore_batcher(MockCursor(), 10)
+        self.assertNotIsInstance(batcher, mover.RestoreCopyBatcher)
+
+    def test_make_restore_batcher_copy(self):
+        from relstorage.tests import MockCursor
+        inst = self._makeOne(keep_history=False)
+        inst.driver.supports_copy = True
+        batcher = inst.make_restore_batcher(MockCursor(), 10)
+        self.assertIsInstance(batcher, mover.RestoreCopyBatcher)
+        inst.restore(None, batcher, 1, 2, b'abc')
+        self.assertEqual(list(batcher._oids), [1])
+        self.assertEqual(list(batcher._tids), [2])
+        self.assertEqual(batcher._states, [b'abc'])
+
+
+class TestLobChunkSize(TestCase):
+
+    def _makeOne(self, **options):
+        return mover.PostgreSQLObjectMover(PGMockDriver(),
+                                           MockOptions.from_args(**options))
+
+    def test_default_is_not_smaller_than_emulation_default(self):
+        from ..drivers._lobject import DEFAULT_CHUNK_SIZE
+        inst = self._makeOne(keep_history=False)
+        self.assertLess(inst.blob_chunk_size, DEFAULT_CHUNK_SIZE)
+        self.assertEqual(inst.lob_chunk_size, DEFAULT_CHUNK_SIZE)
+
+    def test_larger_blob_chunk_size_used(self):
+        inst = self._makeOne(keep_history=False, blob_chunk_size=64 * 1024 * 1024)
+        self.assertEqual(inst.lob_chunk_size, 64 * 1024 * 1024)
+
+
+class _Connection(object):
+    pass
+
+
+class _CopyCursor(object):
+
+    def __init__(self):
+        self.executed = []
+        self.copied = []
+        self.connection = _Connection()
+
+    def execute(self, stmt, params=None):
+        self.executed.append((stmt, params))
+
+    def copy_expert(self, stmt, stream):
+        self.copied.append((stmt, stream.read()))
+
+
+class TestRestoreCopyBatcher(TestCase):
+
+    def _makeOne(self, keep_history, row_limit=100):
+        cursor = _CopyCursor()
+        digester = lambda data: None if data is None else 'a' * 32
+        return mover.RestoreCopyBatcher(cursor, row_limit, keep_history, digester)
+
+    def test_flush_empty(self):
+        batcher = self._makeOne(False)
+        self.assertEqual(batcher.flush(), 0)
+        self.assertEqual(batcher.cursor.executed, [])
+        self.assertEqual(batcher.cursor.copied, [])
+
+    def test_hf_replaces_rows_and_flushes_at_limit(self):
+        batcher = self._makeOne(False, row_limit=2)
+        batcher.add(1, 2, b'abc')
+        batcher.add(1, 3, b'def')
+        self.assertEqual(batcher.cursor.copied, [])
+        batcher.add(2, 3, b'')
+        # Hit the row limit, so it flushed.
+        self.assertEqual(batcher._states, [])
+        self.assertEqual(batcher._row_index, {})
+        self.assertEqual(batcher.total_rows_inserted, 2)
+
+        cursor = batcher.cursor
+        self.assertEqual(len(cursor.copied), 1)
+        self.assertEqual(
+            [stmt for stmt, _ in cursor.executed],
+            [batcher.CREATE_HF_STMT, batcher.PREPARE_HF_STMT, batcher.EXECUTE_HF_STMT])
+        stmt, payload = cursor.copied[0]
+        self.assertEqual(stmt, batcher.COPY_HF_STMT)
+        header = mover.TempStoreCopyBuffer.HEADER
+        self.assertEqual(
+            payload,
+            header
+            + batcher._HF_ROW.pack(3, 8, 1, 8, 3, 3) + b'def'
+            # Empty state is a deletion.
+            + batcher._HF_ROW.pack(3, 8, 2, 8, 3, -1)
+            + mover.TempStoreCopyBuffer.TRAILER
+        )
+
+        # The table is only created once
+        batcher.add(3, 3, b'ghi')
+        batcher.flush()
+        self.assertEqual(
+            [stmt for stmt, _ in cursor.executed],
+            [batcher.CREATE_HF_STMT, batcher.PREPARE_HF_STMT,
+             batcher.EXECUTE_HF_STMT, batcher.EXECUTE_HF_STMT])
+
+        # And the statement is only prepared once per connection.
+        del cursor.executed[:]
+        batcher = mover.RestoreCopyBatcher(cursor, 2, False, None)
+        batcher.add(1, 2, b'abc')
+        batcher.flush()
+        self.assertEqual(
+            [stmt for stmt, _ in cursor.executed],
+            [batcher.CREATE_HF_STMT, batcher.EXECUTE_HF_STMT])
+
+    def test_hp_encodes_md5(self):
+        batcher = self._makeOne(True)
+        batcher.add(1, 2, b'abc')
+        batcher.add(1, 3, None)
+        self.assertEqual(batcher.flush(), 2)
+        _, payload = batcher.cursor.copied[0]
+        self.assertEqual(
+            payload,
+            mover.TempStoreCopyBuffer.HEADER
+            + batcher._HP_ROW.pack(4, 8, 1, 8, 2, 32, b'a' * 32, 3) + b'abc'
+            + batcher._HP_ROW_NULL.pack(4, 8, 1, 8, 3, -1, -1)
+            + mover.TempStoreCopyBuffer.TRAILER
+        )
@@ -174,8 +174,14 @@ class CompiledQuery(object):
 
     _connection_cache = WeakKeyDictionary()
 
-    def _stmt_cache_for_connection(self, connection):
-        """Returns a dictionary."""
+    @classmethod
+    def _stmt_cache_for_connection(cls, connection):
+        """
+        Returns a dictionary.
+
+        Other code that prepares statements for a connection
+        may share this.
+        """
         # If we can't store it directly on the cursor, as happens for
         # types implemented in C, we use a weakkey dictionary.
         try:
@@ -184,9 +190,9 @@ class CompiledQuery(object):
             try:
                 session_prep_stmts = connection._rs_prepared_statements = {}
             except AttributeError:
-                session_prep_stmts = self._connection_cache.get(connection)
+                session_prep_stmts = cls._connection_cache.get(connection)
                 if session_prep_stmts is None:
-                    session_prep_stmts = self._connection_cache[connection] = {}
+                    session_prep_stmts = cls._connection_cache[connection] = {}
         return session_prep_stmts
 
     def execute(self, cursor, params=None):
@@ -16,16 +16,18 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import os
+import shutil
 import tempfile
 
 from ZODB.blob import remove_committed_dir
 from ZODB.POSException import StorageTransactionError
 
-from hamcrest import assert_that
-from nti.testing.matchers import validly_provides
+from zope.interface.verify import verifyObject
 
 from relstorage.tests import TestCase
 
+from .. import BlobHelper
+from .. import NoBlobHelper
 from ..interfaces import IBlobHelper
 
 test_oid = b'\0' * 7 + b'\x01'
@@ -33,87 +35,244 @@ test_tid = b'\0' * 7 + b'\x02'
 
 
 def write_file(fn, data):
-    assert isinstance(data, str)
-    with open(fn, 'w') as f:
-        f.write(data)
+    # Binary, with no buffering or codecs: one write() call.
+    if not isinstance(data, bytes):
+        data = data.encode('ascii')
+    fd = os.open(fn, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
 
 
 def read_file(fn):
-    with open(fn, 'r') as f:
-        return f.read()
+    with open(fn, 'rb') as f:
+        return f.read().decode('ascii')
 
 
-class BlobHelperTest(TestCase):
+def exists(fn):
+    # A single access() call, where os.path.exists() stat()s and
+    # catches the errors.
+    return os.access(fn, os.F_OK)
 
-    shared_blob_dir = True
-    move_method = 'vote'
+
+# {(layout_name, oid, tid): path relative to the blob dir}
+_blob_paths = {}
+
+def blob_filename(fshelper, oid, tid):
+    """
+    Like ``fshelper.getBlobFilename(oid, tid)``.
+
+    Every test has its own blob dir, but the layout's part of the path
+    depends only on the layout, oid and tid, and the tests use the
+    same few of those over and over, so remember it.
+    """
+    key = (fshelper.layout_name, oid, tid)
+    try:
+        path = _blob_paths[key]
+    except KeyError:
+        path = _blob_paths[key] = fshelper.layout.getBlobFilePath(oid, tid)
+    return os.path.join(fshelper.base_dir, path)
+
+
+class DummyOptions(object):
+
+    def __init__(self, blob_dir, shared_blob_dir, blob_cache_size):
+        self.blob_dir = blob_dir
+        self.shared_blob_dir = shared_blob_dir
+        self.blob_cache_size = blob_cache_size
+
+
+class DummyMover(object):
+
+    #: The arguments of the last upload.
+    uploaded = None
+
+    def __init__(self, download_action):
+        self.download_action = download_action
+
+    def download_blob(self, cursor, oid_int, tid_int, filename):
+        if self.download_action == 'write':
+            write_file(filename, 'blob here')
+            return 9
+        return 0
+
+    def upload_blob(self, cursor, oid_int, tid_int, filename):
+        self.uploaded = (oid_int, tid_int, filename)
+
+
+class DummyAdapter(object):
+
+    def __init__(self, mover, keep_history):
+        self.mover = mover
+        self.keep_history = keep_history
+
+
+class BlobDirLayer(object):
+    """
+    Gives all the blob_dirs created by tests in the layer a common
+    parent directory, so anything a test fails to clean up
+    doesn't linger in the system temp dir.
+
+    zope.testrunner doesn't call ``setUpClass``, but it does set up
+    layers. Other runners ignore this and leave ``root`` as None,
+    meaning the system temp dir.
+    """
+
+    root = None
+
+    #: Helpers to make new instances from, for tests that don't use
+    #: the files in the blob dir. See
+    #: :meth:`BlobHelperTestMixin._make_from_template`.
+    #: ``{shared_blob_dir: helper}``
+    templates = None
+
+    #: Put the root on a RAM-backed filesystem, if there is one?
+    #: These tests create and remove lots of tiny files, and there's
+    #: no reason for any of that to reach a disk. Set to False to use
+    #: the system temp dir.
+    RAM_TEMP = os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK)
+
+    @classmethod
+    def setUp(cls):
+        cls.root = tempfile.mkdtemp(prefix='blobhelpertest',
+                                    dir='/dev/shm' if cls.RAM_TEMP else None)
+        cls.templates = {}
+
+    @classmethod
+    def tearDown(cls):
+        for helper in cls.templates.values():
+            helper.close()
+        cls.templates = None
+        shutil.rmtree(cls.root, ignore_errors=True)
+        cls.root = None
+
+
+class BlobHelperTestMixin(object):
+    # Tests common to shared and private (cached) blob dirs. Each
+    # kind has its own concrete class, and they share nothing but
+    # the layer, so they can run in parallel.
+
+    shared_blob_dir = None
+    move_method = None
+
+    layer = BlobDirLayer
+
+    # Each concrete class makes its adapters once (there are only
+    # two) and gives them a new mover for each test; see
+    # _make_adapter(). {keep_history: DummyAdapter}
+    _adapters = None
+    _mover = None
 
     def setUp(self):
-        self.uploaded = None
-        self.blob_dir = tempfile.mkdtemp()
+        self.blob_dir = tempfile.mkdtemp(dir=self.layer.root)
+        # Names of files in the blob_dir that many tests use.
+        self._fn_0001 = os.path.join(self.blob_dir, '0001')
+        self._fn_newblob = os.path.join(self.blob_dir, 'newblob')
 
     def tearDown(self):
-        remove_committed_dir(self.blob_dir)
+        if not os.listdir(self.blob_dir):
+            # Only tests that use _make_from_template() get here;
+            # creating a helper for this dir writes .layout and tmp/.
+            os.rmdir(self.blob_dir)
+        else:
+            # Committed blob files are read-only, which this knows how
+            # to deal with.
+            remove_committed_dir(self.blob_dir)
 
     def _class(self):
-        from relstorage.blobhelper import BlobHelper
         return BlobHelper
 
     def _make(self, *args, **kw):
         return self._class()(*args, **kw)
 
+    @property
+    def uploaded(self):
+        return self._mover.uploaded if self._mover is not None else None
+
+    def _make_adapter(self, download_action, keep_history):
+        cls = type(self)
+        adapters = cls.__dict__.get('_adapters')
+        if adapters is None:
+            # Not inherited: no class shares it with another.
+            adapters = cls._adapters = {}
+        try:
+            adapter = adapters[keep_history]
+        except KeyError:
+            adapter = adapters[keep_history] = DummyAdapter(None, keep_history)
+        # Tests within a class run one at a time; a fresh mover keeps
+        # what one test uploads away from the next.
+        adapter.mover = self._mover = DummyMover(download_action)
+        return adapter
+
     def _make_default(self, cache_size=None,
                       download_action='write', keep_history=True):
-        test = self
-
-        class DummyOptions(object):
-            blob_dir = self.blob_dir
-            shared_blob_dir = self.shared_blob_dir
-            blob_cache_size = cache_size
-
-        class DummyMover(object):
-            def download_blob(self, cursor, oid_int, tid_int, filename):
-                if download_action == 'write':
-                    write_file(filename, 'blob here')
-                    return 9
-                return 0
-
-            def upload_blob(self, cursor, oid_int, tid_int, filename):
-                test.uploaded = (oid_int, tid_int, filename)
-
-        class DummyAdapter(object):
-            mover = DummyMover()
-
-            def __init__(self):
-                self.keep_history = keep_history
+        # The options name this test's blob_dir, so they can't be shared.
+        options = DummyOptions(self.blob_dir, self.shared_blob_dir, cache_size)
+        adapter = self._make_adapter(download_action, keep_history)
+        blobhelper = self._make(options, adapter)
+        blobhelper.begin()
+        return blobhelper
 
-        blobhelper = self._make(DummyOptions(), DummyAdapter())
+    def _make_from_template(self):
+        """
+        Like :meth:`_make_default`, but shares the filesystem helper
+        (and cache checker) of a helper created once per layer, using
+        ``new_instance``, as storages do. Creating those touches the
+        disk.
+
+        Only for tests that don't care what's in the blob dir, because
+        it isn't ``self.blob_dir``.
+        """
+        templates = self.layer.templates
+        if templates is None:
+            # Not running under zope.testrunner.
+            return self._make_default()
+        key = self.shared_blob_dir
+        adapter = self._make_adapter('write', True)
+        try:
+            template = templates[key]
+        except KeyError:
+            options = DummyOptions(tempfile.mkdtemp(dir=self.layer.root),
+                                   self.shared_blob_dir, None)
+            template = templates[key] = self._make(options, adapter)
+        blobhelper = template.new_instance(adapter)
         blobhelper.begin()
         return blobhelper
 
+    def _seed_blob(self, blobhelper, oid, tid, data=b'blob here'):
+        """
+        Put a committed blob file in place for *oid* and *tid*, and
+        return its name.
+        """
+        fn = blob_filename(blobhelper.fshelper, oid, tid)
+        dirname = os.path.dirname(fn)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        write_file(fn, data)
+        return fn
+
     def test_provides(self):
-        assert_that(self._make_default(), validly_provides(IBlobHelper))
+        self.assertTrue(verifyObject(IBlobHelper, self._make_from_template()))
 
     def test_cannot_begin_twice(self):
-        blobhelper = self._make_default()
+        blobhelper = self._make_from_template()
         with self.assertRaises(StorageTransactionError):
             blobhelper.begin()
 
     def test_begin_after_abort(self):
-        blobhelper = self._make_default()
+        blobhelper = self._make_from_template()
         blobhelper.abort()
         blobhelper.begin()
 
     def test_begin_after_finish(self):
-        blobhelper = self._make_default()
+        blobhelper = self._make_from_template()
         blobhelper.finish(b'tid')
         blobhelper.begin()
 
     def test_loadBlob_shared_exists(self):
         blobhelper = self._make_default()
-        fn = blobhelper.fshelper.getBlobFilename(test_oid, test_tid)
-        os.makedirs(os.path.dirname(fn))
-        write_file(fn, 'blob here')
+        fn = self._seed_blob(blobhelper, test_oid, test_tid)
         res = blobhelper.loadBlob(None, test_oid, test_tid)
         self.assertEqual(fn, res)
 
@@ -124,10 +283,10 @@ class BlobHelperTest(TestCase):
         def store_func(oid, tid, data, txn):
             called.append((oid, tid, data, txn))
 
-        fn1 = os.path.join(self.blob_dir, 'newblob')
-        write_file(fn1, 'here a blob')
+        fn1 = self._fn_newblob
+        write_file(fn1, b'here a blob')
         fn2 = os.path.join(self.blob_dir, 'newblob2')
-        write_file(fn2, 'there a blob')
+        write_file(fn2, b'there a blob')
 
         blobhelper = self._make_default()
         self.assertFalse(blobhelper.txn_has_blobs)
@@ -135,11 +294,15 @@ class BlobHelperTest(TestCase):
                              fn1, '', dummy_txn)
         blobhelper.storeBlob(None, store_func, test_oid, test_tid, 'blob pickle',
                              fn2, '', dummy_txn)
-        self.assertFalse(os.path.exists(fn1))
-        self.assertFalse(os.path.exists(fn2))
+        self.assertFalse(exists(fn1))
+        self.assertFalse(exists(fn2))
         self.assertTrue(blobhelper.txn_has_blobs)
         target_fn = blobhelper._txn_blobs[test_oid]
-        self.assertEqual(read_file(target_fn), 'there a blob')
+        # The payloads differ in length, so the size alone says
+        # which one we kept.
+        self.assertEqual(os.path.getsize(target_fn), len(b'there a blob'))
+        with open(target_fn, 'rb') as f:
+            self.assertEqual(f.read(), b'there a blob')
 
     def test_move_into_place(self):
         blobhelper = self._make_default()
@@ -149,7 +312,7 @@ class BlobHelperTest(TestCase):
         blobhelper._txn_blobs = {test_oid: fn1}
         move_method = getattr(blobhelper, self.move_method)
         move_method(test_tid)
-        fn2 = blobhelper.fshelper.getBlobFilename(test_oid, test_tid)
+        fn2 = blob_filename(blobhelper.fshelper, test_oid, test_tid)
         self.assertEqual(read_file(fn2), 'here a blob')
 
     def test_abort(self):
@@ -159,19 +322,18 @@ class BlobHelperTest(TestCase):
         write_file(fn1, 'here a blob')
         blobhelper._txn_blobs = {test_oid: fn1}
         blobhelper.abort()
-        fn2 = blobhelper.fshelper.getBlobFilename(test_oid, test_tid)
-        self.assertFalse(os.path.exists(fn1))
-        self.assertFalse(os.path.exists(fn2))
+        fn2 = blob_filename(blobhelper.fshelper, test_oid, test_tid)
+        self.assertFalse(exists(fn1))
+        self.assertFalse(exists(fn2))
 
 
 class NoBlobHelperTest(TestCase):
 
     def _class(self):
-        from relstorage.blobhelper import NoBlobHelper
         return NoBlobHelper
 
     def makeOne(self):
         return self._class()()
 
     def test_provides(self):
-        assert_that(self.makeOne(), validly_provides(IBlobHelper))
+        self.assertTrue(verifyObject(IBlobHelper, self.makeOne()))
@@ -18,17 +18,30 @@ from __future__ import print_function
 
 import os
 
-from relstorage._compat import PY3
+from ZODB.blob import LAYOUTS
+from ZODB.blob import Blob
+from ZODB.blob import BlobFile
+from ZODB.POSException import POSKeyError
+
+from relstorage.tests import TestCase
 
 from . import test_blobhelper
+from .test_blobhelper import blob_filename
+from .test_blobhelper import exists
 from .test_blobhelper import write_file
 from .test_blobhelper import read_file
 from .test_blobhelper import test_oid
 from .test_blobhelper import test_tid
 
+# What the builtin open() returns: ``file`` on Python 2,
+# ``io.BufferedReader`` on Python 3.
+with open(os.devnull, 'rb') as _f:
+    PlainFile = type(_f)
+del _f
 
 
-class CacheBlobHelperTest(test_blobhelper.BlobHelperTest):
+class CacheBlobHelperTest(test_blobhelper.BlobHelperTestMixin,
+                          TestCase):
     # Tests that only apply to cache dirs
 
     shared_blob_dir = False
@@ -38,7 +51,8 @@ class CacheBlobHelperTest(test_blobhelper.BlobHelperTest):
         blobhelper = self._make_default()
         self.assertIsNotNone(blobhelper.fshelper)
         self.assertIsNotNone(blobhelper.cache_checker)
-        from ZODB.blob import LAYOUTS
+        # The cache layout isn't registered until the first cache
+        # helper is created, so we can't look it up any sooner.
         self.assertEqual(blobhelper.fshelper.layout, LAYOUTS['zeocache'])
 
     def test_new_instance(self):
@@ -56,65 +70,63 @@ class CacheBlobHelperTest(test_blobhelper.BlobHelperTest):
 
 
     def test_download_found(self):
-        fn = os.path.join(self.blob_dir, '0001')
+        fn = self._fn_0001
         blobhelper = self._make_default()
         blobhelper.download_blob(None, test_oid, test_tid, fn)
-        self.assertTrue(os.path.exists(fn))
+        self.assertTrue(exists(fn))
 
     def test_download_not_found(self):
-        fn = os.path.join(self.blob_dir, '0001')
+        fn = self._fn_0001
         blobhelper = self._make_default(download_action=None)
         blobhelper.download_blob(None, test_oid, test_tid, fn)
-        self.assertFalse(os.path.exists(fn))
+        self.assertFalse(exists(fn))
 
     def test_upload_without_tid(self):
-        fn = os.path.join(self.blob_dir, '0001')
+        fn = self._fn_0001
         blobhelper = self._make_default()
         blobhelper.upload_blob(None, test_oid, None, fn)
         self.assertEqual(self.uploaded, (1, None, fn))
 
     def test_upload_with_tid(self):
-        fn = os.path.join(self.blob_dir, '0001')
+        fn = self._fn_0001
         blobhelper = self._make_default()
         blobhelper.upload_blob(None, test_oid, test_tid, fn)
         self.assertEqual(self.uploaded, (1, 2, fn))
 
     def test_loadBlob_unshared_exists(self):
         blobhelper = self._make_default()
-        fn = blobhelper.fshelper.getBlobFilename(test_oid, test_tid)
-        os.makedirs(os.path.dirname(fn))
-        write_file(fn, 'blob here')
+        fn = self._seed_blob(blobhelper, test_oid, test_tid)
         res = blobhelper.loadBlob(None, test_oid, test_tid)
         self.assertEqual(fn, res)
 
     def test_loadBlob_unshared_download(self):
         blobhelper = self._make_default()
-        fn = blobhelper.fshelper.getBlobFilename(test_oid, test_tid)
+        fn = blob_filename(blobhelper.fshelper, test_oid, test_tid)
         res = blobhelper.loadBlob(None, test_oid, test_tid)
         self.assertEqual(fn, res)
 
     def test_loadBlob_unshared_missing(self):
         blobhelper = self._make_default(download_action=None)
-        from ZODB.POSException import POSKeyError
-        self.assertRaises(POSKeyError, blobhelper.loadBlob, None, test_oid, test_tid)
+        with self.assertRaises(POSKeyError):
+            blobhelper.loadBlob(None, test_oid, test_tid)
 
     def test_openCommittedBlobFile_as_file(self):
         blobhelper = self._make_default()
         with blobhelper.openCommittedBlobFile(None, test_oid, test_tid) as f:
-            if not PY3:
-                self.assertEqual(f.__class__, file) # pylint:disable=undefined-variable
+            self.assertEqual(f.__class__, PlainFile)
             self.assertEqual(f.read(), b'blob here')
 
     def test_openCommittedBlobFile_as_blobfile(self):
         blobhelper = self._make_default()
-        from ZODB.blob import Blob
-        from ZODB.blob import BlobFile
         b = Blob()
         with blobhelper.openCommittedBlobFile(None, test_oid, test_tid, blob=b) as f:
             self.assertEqual(f.__class__, BlobFile)
             self.assertEqual(f.read(), b'blob here')
 
-    def test_openCommittedBlobFile_retry_as_file(self):
+    def _run_retry(self, use_blob):
+        # The first time we load the blob file, it vanishes before it
+        # can be opened; we download it again. Returns the class of
+        # the file that was opened.
         loadBlob_calls = []
         blobhelper = self._make_default()
         orig_loadBlobInternal = blobhelper._loadBlobInternal
@@ -126,32 +138,19 @@ class CacheBlobHelperTest(test_blobhelper.BlobHelperTest):
             return fn
 
         blobhelper._loadBlobInternal = loadBlob_wrapper
-        with blobhelper.openCommittedBlobFile(None, test_oid, test_tid) as f:
+        args = (Blob(),) if use_blob else ()
+        with blobhelper.openCommittedBlobFile(None, test_oid, test_tid, *args) as f:
             self.assertEqual(loadBlob_calls, [1])
-            if not PY3:
-                self.assertEqual(f.__class__, file) # pylint:disable=undefined-variable
             self.assertEqual(f.read(), b'blob here')
+            return f.__class__
 
-    def test_openCommittedBlobFile_retry_as_blobfile(self):
-        loadBlob_calls = []
-        blobhelper = self._make_default()
-
-        orig_loadBlobInternal = blobhelper._loadBlobInternal
-        def loadBlob_wrapper(cursor, oid, serial, blob_lock):
-            fn = orig_loadBlobInternal(cursor, oid, serial, blob_lock)
-            if not loadBlob_calls:
-                os.remove(fn)
-                loadBlob_calls.append(1)
-            return fn
+    def test_openCommittedBlobFile_retry_as_file(self):
+        kind = self._run_retry(use_blob=False)
+        self.assertEqual(kind, PlainFile)
 
-        blobhelper._loadBlobInternal = loadBlob_wrapper
-        from ZODB.blob import Blob
-        from ZODB.blob import BlobFile
-        b = Blob()
-        with blobhelper.openCommittedBlobFile(None, test_oid, test_tid, b) as f:
-            self.assertEqual(loadBlob_calls, [1])
-            self.assertEqual(f.__class__, BlobFile)
-            self.assertEqual(f.read(), b'blob here')
+    def test_openCommittedBlobFile_retry_as_blobfile(self):
+        kind = self._run_retry(use_blob=True)
+        self.assertEqual(kind, BlobFile)
 
     def test_storeBlob_unshared(self):
         called = []
@@ -160,14 +159,14 @@ class CacheBlobHelperTest(test_blobhelper.BlobHelperTest):
         def store_func(oid, tid, data, txn):
             called.append((oid, tid, data, txn))
 
-        fn = os.path.join(self.blob_dir, 'newblob')
+        fn = self._fn_newblob
         write_file(fn, 'here a blob')
 
         blobhelper = self._make_default()
         self.assertFalse(blobhelper.txn_has_blobs)
         blobhelper.storeBlob(None, store_func, test_oid, test_tid, 'blob pickle',
                              fn, '', dummy_txn)
-        self.assertFalse(os.path.exists(fn))
+        self.assertFalse(exists(fn))
         self.assertTrue(blobhelper.txn_has_blobs)
         self.assertEqual(called,
                          [(test_oid, test_tid, 'blob pickle', dummy_txn)])
@@ -176,7 +175,7 @@ class CacheBlobHelperTest(test_blobhelper.BlobHelperTest):
         self.assertEqual(read_file(target_fn), 'here a blob')
 
     def test_restoreBlob_unshared(self):
-        fn = os.path.join(self.blob_dir, 'newblob')
+        fn = self._fn_newblob
         write_file(fn, 'here a blob')
         blobhelper = self._make_default()
         blobhelper.restoreBlob(None, test_oid, test_tid, fn)
@@ -41,6 +41,11 @@ class Restore(object):
     # calling the database.
     batcher_row_limit = 100
 
+    # _pending_blobs: A list of ``(oid, serial, blobfilename)`` for
+    # blobs that have been restored but not yet written. They're written
+    # when we vote, after the batcher has been flushed.
+    _pending_blobs = ()
+
     # Methods from the underlying begin implementation we need to
     # expose.
     _COPY_ATTRS = (
@@ -81,9 +86,10 @@ class Restore(object):
             raise
 
         # This is now only used for restore()
-        self.batcher = batcher = adapter.mover.make_batcher(
+        self.batcher = batcher = adapter.mover.make_restore_batcher(
             cursor,
             self.batcher_row_limit)
+        self._pending_blobs = pending_blobs = []
 
         for name in self._COPY_ATTRS:
             try:
@@ -100,8 +106,9 @@ class Restore(object):
         def tpc_vote_factory(begin_state,
                              _f=_HFVoteFactory if factory is HFVoteFactory else _HPVoteFactory,
                              _c=committing_tid_lock,
-                             _b=batcher):
-            return _f(begin_state, _c, _b)
+                             _b=batcher,
+                             _p=pending_blobs):
+            return _f(begin_state, _c, _b, _p)
         begin_state.tpc_vote_factory = tpc_vote_factory
         begin_state.shared_state.temp_storage = _TempStorageWrapper(
             begin_state.shared_state.temp_storage)
@@ -128,24 +135,22 @@ class Restore(object):
         state.shared_state.temp_storage.max_restored_oid = max(
             state.shared_state.temp_storage.max_restored_oid,
             oid_int)
-        # TODO: Make it go through the cache, or at least the same
-        # sort of queing thing, so that we can do a bulk COPY.
+        # The mover may queue this in a specialized batcher (e.g., to do a bulk COPY).
         # The way we do it now complicates restoreBlob() and it complicates voting.
         adapter.mover.restore(
             cursor, self.batcher, oid_int, tid_int, data)
 
     def restoreBlob(self, oid, serial, data, blobfilename, prev_txn, txn):
         self.restore(oid, serial, data, prev_txn, txn)
-        state = self.wrapping
         # Restoring the entry for the blob MAY have used the batcher, and
         # we're going to want to foreign-key off of that data when
         # we add blob chunks (since we skip the temp tables).
-        # Ideally, we wouldn't need to flush the batcher here
-        # (we'd prefer having DEFERRABLE INITIALLY DEFERRED FK
-        # constraints, but as-of 8.0 MySQL doesn't support that.)
-        self.batcher.flush()
-        cursor = state.shared_state.store_connection.cursor
-        state.shared_state.blobhelper.restoreBlob(cursor, oid, serial, blobfilename)
+        # Ideally, we'd have DEFERRABLE INITIALLY DEFERRED FK
+        # constraints, but as-of 8.0 MySQL doesn't support that.
+        # So rather than flush the batcher for every blob, we hold on
+        # to the blobs until we vote and write them all after the
+        # final flush.
+        self._pending_blobs.append((oid, serial, blobfilename))
 
 class _TempStorageWrapper(object):
 
@@ -174,21 +179,25 @@ class _TempStorageWrapper(object):
 class _VoteFactoryMixin(object):
     __slots__ = ()
 
-    def __init__(self, begin_state, committing_tid_lock, batcher):
-        # type: (Restore, Optional[DatabaseLockedForTid], Any) -> None
+    def __init__(self, begin_state, committing_tid_lock, batcher, pending_blobs=()):
+        # type: (Restore, Optional[DatabaseLockedForTid], Any, list) -> None
         super(_VoteFactoryMixin, self).__init__(begin_state)
         # pylint:disable=assigning-non-slot
         self.committing_tid_lock = committing_tid_lock
         self.batcher = batcher
+        self.pending_blobs = pending_blobs
 
     def _flush_temps_to_db(self, cursor):
         super(_VoteFactoryMixin, self)._flush_temps_to_db(cursor)
         self.batcher.flush()
+        blobhelper = self.shared_state.blobhelper
+        for oid, serial, blobfilename in self.pending_blobs:
+            blobhelper.restoreBlob(cursor, oid, serial, blobfilename)
 
 
 class _HFVoteFactory(_VoteFactoryMixin, HFVoteFactory):
-    __slots__ = ('batcher',)
+    __slots__ = ('batcher', 'pending_blobs')
 
 
 class _HPVoteFactory(_VoteFactoryMixin, HPVoteFactory):
-    __slots__ = ('batcher',)
+    __slots__ = ('batcher', 'pending_blobs')
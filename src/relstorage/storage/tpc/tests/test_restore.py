@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for restore.py.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+from ZODB.utils import p64
+
+from relstorage.tests import mock
+
+from ..vote import HistoryFree as HFVoteFactory
+from ..vote import HistoryPreserving as HPVoteFactory
+
+
+OID1 = p64(1)
+OID2 = p64(2)
+TID1 = p64(3)
+TID2 = p64(4)
+
+
+class TestRestoreBlob(unittest.TestCase):
+
+    vote_factory = HFVoteFactory
+
+    def setUp(self):
+        # Record calls to the batcher and the blob helper in one
+        # place so we can check their relative order.
+        self.calls = mock.Mock()
+        self.batcher = self.calls.batcher
+        self.blobhelper = self.calls.blobhelper
+        self.cursor = object()
+
+        begin_state = mock.Mock()
+        begin_state.ude = (b'user', b'description', b'extension')
+        begin_state.tpc_vote_factory = self.vote_factory
+        shared_state = begin_state.shared_state
+        shared_state.store_connection.cursor = self.cursor
+        shared_state.blobhelper = self.blobhelper
+        shared_state.has_temp_data.return_value = False
+        shared_state.adapter.mover.make_restore_batcher.return_value = self.batcher
+        self.begin_state = begin_state
+
+    def _makeOne(self):
+        from ..restore import Restore
+        return Restore(self.begin_state, TID2, ' ')
+
+    def test_restoreBlob_does_not_flush(self):
+        restore = self._makeOne()
+        txn = self.begin_state.transaction
+        restore.restoreBlob(OID1, TID1, b'data1', 'file1', None, txn)
+        restore.restoreBlob(OID2, TID2, b'data2', 'file2', None, txn)
+
+        self.batcher.flush.assert_not_called()
+        self.blobhelper.restoreBlob.assert_not_called()
+        mover = self.begin_state.shared_state.adapter.mover
+        self.assertEqual(mover.restore.call_count, 2)
+        self.assertEqual(restore._pending_blobs, [
+            (OID1, TID1, 'file1'),
+            (OID2, TID2, 'file2'),
+        ])
+
+    def test_vote_flushes_then_writes_blobs(self):
+        restore = self._makeOne()
+        txn = self.begin_state.transaction
+        restore.restoreBlob(OID1, TID1, b'data1', 'file1', None, txn)
+        restore.restoreBlob(OID2, TID2, b'data2', 'file2', None, txn)
+        self.calls.reset_mock()
+
+        vote = self.begin_state.tpc_vote_factory(self.begin_state)
+        self.assertIsInstance(vote, self.vote_factory)
+        vote._flush_temps_to_db(self.cursor)
+
+        self.assertEqual(self.calls.mock_calls, [
+            mock.call.batcher.flush(),
+            mock.call.blobhelper.restoreBlob(self.cursor, OID1, TID1, 'file1'),
+            mock.call.blobhelper.restoreBlob(self.cursor, OID2, TID2, 'file2'),
+        ])
+
+
+class TestRestoreBlobHP(TestRestoreBlob):
+
+    vote_factory = HPVoteFactory